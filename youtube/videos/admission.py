@@ -0,0 +1,226 @@
+"""
+Admission control for video uploads.
+
+Each user gets a token bucket (``UPLOAD_RATE_LIMIT`` uploads per
+``UPLOAD_RATE_PERIOD`` seconds, bursting up to ``UPLOAD_BURST``) and the
+whole node shares ``UPLOAD_MAX_CONCURRENT`` leased in-flight upload
+slots. Both live in the default cache, which must be shared between
+workers (e.g. Redis) for the limits to apply node-wide.
+
+Rejections happen in middleware before CSRF validation reads the request
+body, so shed uploads cost a cache round trip instead of a 100 MB parse.
+Uploads beyond the node's cap are shed at once rather than queued: waiting
+for a slot would hold a worker that could be serving pages, which is the
+scarcer resource while the node is saturated. Clients retry after
+``UPLOAD_RETRY_AFTER`` seconds instead.
+"""
+import math
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+from youtube.logging_utils import get_logger, log_with_context
+
+logger = get_logger(__name__)
+
+METRIC_NAMES = ("admitted", "contended", "rate_limited", "saturated")
+
+# Upper bound on how long a crashed worker can hold a user's bucket lock
+_LOCK_TIMEOUT = 5
+# The lock is only held for a couple of cache round trips, so a few short
+# retries (50 ms at most) ride out another request of the same user
+_LOCK_ATTEMPTS = 10
+_LOCK_RETRY_DELAY = 0.005
+
+
+def upload_admission(view_func):
+    """
+    Mark a view as an upload endpoint subject to admission control.
+    """
+    view_func.upload_admission = True
+    return view_func
+
+
+def _incr_metric(name: str) -> None:
+    key = f"uploads:metrics:{name}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_upload_metrics() -> dict:
+    """Return admission counters and the current number of in-flight uploads."""
+    counters = cache.get_many([f"uploads:metrics:{name}" for name in METRIC_NAMES])
+    metrics = {name: counters.get(f"uploads:metrics:{name}", 0) for name in METRIC_NAMES}
+    metrics["in_flight"] = len(cache.get_many(_slot_keys()))
+    metrics["max_concurrent"] = settings.UPLOAD_MAX_CONCURRENT
+    return metrics
+
+
+def _bucket_key(user_id: int) -> str:
+    return f"uploads:bucket:{user_id}"
+
+
+@contextmanager
+def _locked(key: str):
+    """
+    Hold a short-lived lock on ``key``, yielding whether it was acquired.
+
+    ``cache.add`` only succeeds for one caller, so this is atomic on any
+    shared cache backend.
+    """
+    lock_key = f"{key}:lock"
+    for attempt in range(_LOCK_ATTEMPTS):
+        acquired = cache.add(lock_key, 1, timeout=_LOCK_TIMEOUT)
+        if acquired or attempt == _LOCK_ATTEMPTS - 1:
+            break
+        time.sleep(_LOCK_RETRY_DELAY)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+
+def _bucket_timeout(rate: float) -> int:
+    # An untouched bucket is full again after this long, so it can expire
+    return math.ceil(settings.UPLOAD_BURST / rate)
+
+
+def take_upload_token(user_id: int) -> Optional[float]:
+    """
+    Take a token from the user's bucket.
+
+    Returns:
+        0 if a token was taken, the seconds until one is available if the
+        bucket is empty, or None if the bucket stayed locked by another
+        request
+    """
+    rate = settings.UPLOAD_RATE_LIMIT / settings.UPLOAD_RATE_PERIOD
+    capacity = settings.UPLOAD_BURST
+
+    with _locked(_bucket_key(user_id)) as acquired:
+        if not acquired:
+            return None
+
+        now = time.time()
+        tokens, updated = cache.get(_bucket_key(user_id), (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+
+        cache.set(_bucket_key(user_id), (tokens - 1, now), timeout=_bucket_timeout(rate))
+        return 0
+
+
+def refund_upload_token(user_id: int) -> None:
+    """Give back a token taken for an upload that was then shed."""
+    rate = settings.UPLOAD_RATE_LIMIT / settings.UPLOAD_RATE_PERIOD
+    with _locked(_bucket_key(user_id)) as acquired:
+        if not acquired:
+            log_with_context(logger, 'warning', 'Upload token refund dropped, bucket locked',
+                            user_id=user_id)
+            return
+        bucket = cache.get(_bucket_key(user_id))
+        if bucket:
+            tokens, updated = bucket
+            cache.set(_bucket_key(user_id), (min(settings.UPLOAD_BURST, tokens + 1), updated),
+                      timeout=_bucket_timeout(rate))
+
+
+def _slot_keys() -> list:
+    return [f"uploads:slot:{slot}" for slot in range(settings.UPLOAD_MAX_CONCURRENT)]
+
+
+def acquire_upload_slot() -> Optional[Tuple[str, str]]:
+    """
+    Lease one of the node's in-flight upload slots.
+
+    Each slot is its own cache key expiring after ``UPLOAD_SLOT_TIMEOUT``,
+    so a worker that dies mid-upload only holds its slot until then and
+    the count of in-flight uploads can't drift.
+
+    Returns:
+        The lease to pass to ``release_upload_slot``, or None if every
+        slot is taken
+    """
+    keys = _slot_keys()
+    taken = cache.get_many(keys)
+    lease_id = uuid.uuid4().hex
+    for key in keys:
+        if key not in taken and cache.add(key, lease_id, timeout=settings.UPLOAD_SLOT_TIMEOUT):
+            return key, lease_id
+    return None
+
+
+def release_upload_slot(lease: Tuple[str, str]) -> None:
+    key, lease_id = lease
+    # Only free the slot if our lease hasn't expired and been re-leased
+    if cache.get(key) == lease_id:
+        cache.delete(key)
+
+
+def _rejection(status: int, error: str, retry_after: float) -> JsonResponse:
+    response = JsonResponse({"success": False, "error": error}, status=status)
+    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class UploadAdmissionMiddleware:
+    """
+    Middleware admitting or shedding requests to ``upload_admission`` views.
+
+    Must come before CsrfViewMiddleware so rejections skip body parsing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            lease = getattr(request, "upload_slot", None)
+            if lease:
+                release_upload_slot(lease)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(view_func, "upload_admission", False) or request.method != "POST":
+            return None
+        if not request.user.is_authenticated:
+            # Let login_required redirect as usual
+            return None
+
+        retry_after = take_upload_token(request.user.id)
+        if retry_after is None:
+            _incr_metric("contended")
+            log_with_context(logger, 'warning', 'Upload shed, rate limit bucket locked',
+                            user_id=request.user.id)
+            return _rejection(503, "Another upload of yours is starting. Please try again in a moment.", 1)
+        if retry_after:
+            _incr_metric("rate_limited")
+            log_with_context(logger, 'warning', 'Upload rate limited',
+                            user_id=request.user.id,
+                            retry_after=f"{retry_after:.0f}")
+            return _rejection(429, "You are uploading too often. Please try again later.", retry_after)
+
+        lease = acquire_upload_slot()
+        if lease is None:
+            refund_upload_token(request.user.id)
+            _incr_metric("saturated")
+            log_with_context(logger, 'warning', 'Upload shed, server saturated',
+                            user_id=request.user.id,
+                            max_concurrent=settings.UPLOAD_MAX_CONCURRENT)
+            return _rejection(503, "The server is busy. Please try your upload again shortly.",
+                              settings.UPLOAD_RETRY_AFTER)
+
+        request.upload_slot = lease
+        _incr_metric("admitted")
+        return None
@@ -0,0 +1,119 @@
+"""
+Conditional GET support for video pages.
+
+Views declare a cheap validator query; when the client's ETag or
+Last-Modified still matches, a 304 is returned before the view renders.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from youtube.sessions import get_request_user
+from .models import TrendingScore, Video
+from .viewers import channel_unique_viewers, get_viewer_key, record_unique_view
+
+
+def _viewer_tag(request) -> str:
+    # Pages render the navbar differently per user, so validators must too
+    user = get_request_user(request)
+    return f"user-{user.id}" if user.is_authenticated else "anonymous"
+
+
+def conditional_page(validators_func):
+    """
+    Decorator adding ETag / Last-Modified handling to a page view.
+
+    Args:
+        validators_func: Callable taking the view's arguments and returning
+            a (version, last_modified) tuple, or None to let the view run
+            unconditionally (e.g. so it can raise a 404)
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+
+            validators = validators_func(request, *args, **kwargs)
+            if validators is None:
+                return view_func(request, *args, **kwargs)
+
+            version, last_modified = validators
+            digest = hashlib.md5(f"{version}:{_viewer_tag(request)}".encode()).hexdigest()
+            etag = quote_etag(digest)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                response.headers.setdefault("ETag", etag)
+                if timestamp is not None:
+                    response.headers.setdefault("Last-Modified", http_date(timestamp))
+
+            if response.cookies or get_request_user(request).is_authenticated:
+                # Responses setting cookies must never be shared by a fronting cache
+                patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+            else:
+                patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+            patch_vary_headers(response, ("Cookie",))
+            return response
+        return inner
+    return decorator
+
+
+def feed_validators(queryset):
+    stats = queryset.aggregate(last_modified=Max("updated_at"), count=Count("id"))
+    last_modified = stats["last_modified"]
+    version = f"{last_modified.isoformat() if last_modified else ''}-{stats['count']}"
+    return version, last_modified
+
+
+def video_list_validators(request):
+    return feed_validators(Video.objects.all())
+
+
+def channel_validators(request, username):
+    # The channel page also shows its unique viewers, which change without
+    # touching any video, so they are part of the version. No Last-Modified
+    # is sent: it wouldn't move with the count, and If-Modified-Since alone
+    # would then revalidate a stale page.
+    request.unique_viewers = channel_unique_viewers(username)
+    version, _ = feed_validators(Video.objects.filter(user__username=username))
+    return f"{version}-{request.unique_viewers}", None
+
+
+def trending_validators(request):
+    # Listed videos can be edited or deleted between recomputations, so
+    # their count and latest update are part of the version too
+    stats = TrendingScore.objects.aggregate(
+        last_computed=Max("computed_at"),
+        last_updated=Max("video__updated_at"),
+        count=Count("video_id"),
+    )
+    last_modified = max(filter(None, (stats["last_computed"], stats["last_updated"])), default=None)
+    version = "-".join(
+        value.isoformat() if value else "" for value in (stats["last_computed"], stats["last_updated"])
+    )
+    return f"{version}-{stats['count']}", last_modified
+
+
+def video_detail_validators(request, video_id):
+    """
+    Validators for a video's detail page.
+
+    The view is recorded here, before the 304 decision, so revalidated
+    requests still count towards unique viewers, and the viewer count is
+    part of the version so the page never shows a stale number. For the
+    same reason no Last-Modified is sent, as ``updated_at`` doesn't move
+    when the count does.
+    """
+    updated_at = Video.objects.filter(id=video_id).values_list("updated_at", flat=True).first()
+    if updated_at is None:
+        return None
+    request.unique_viewers = record_unique_view(video_id, get_viewer_key(request)).count()
+    return f"{updated_at.isoformat()}-{request.unique_viewers}", None
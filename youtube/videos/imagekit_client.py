@@ -1,10 +1,12 @@
 import os
-from imagekitio import ImageKit
 from youtube.logging_utils import get_logger, log_with_context, log_exception
 
 logger = get_logger(__name__)
 
 def get_imagekit_client():
+    # The SDK is slow to import and only needed for uploads, so load it on
+    # first use instead of at model import time
+    from imagekitio import ImageKit
     return ImageKit()
 
 def get_optimized_video_url(base_url: str) -> str:
@@ -0,0 +1,114 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Django setup plus one request through the WSGI handler, as a fresh worker
+# would do. Anonymous GET of the login page needs no database.
+FIRST_REQUEST_SNIPPET = """
+import os, sys
+from wsgiref.util import setup_testing_defaults
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'youtube.settings')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+environ = {'PATH_INFO': '/accounts/login/', 'HTTP_HOST': '127.0.0.1'}
+setup_testing_defaults(environ)
+statuses = []
+body = application(environ, lambda status, headers: statuses.append(status))
+b''.join(body)
+if not statuses[0].startswith('200'):
+    sys.exit(f'First request failed: {statuses[0]}')
+"""
+
+SETUP_SNIPPET = """
+import os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'youtube.settings')
+import django
+django.setup()
+"""
+
+# Dependencies that must not be imported just by booting the project
+LAZY_MODULES = ["imagekitio", "pythonjsonlogger"]
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start time of fresh worker processes against STARTUP_BUDGET_MS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Cold starts to time.")
+        parser.add_argument("--top", type=int, default=15, help="Packages shown in the import breakdown.")
+        parser.add_argument(
+            "--budget-ms",
+            type=int,
+            default=settings.STARTUP_BUDGET_MS,
+            help="Fail if the median time to first request exceeds this.",
+        )
+
+    def handle(self, *args, **options):
+        self.import_breakdown(options["top"])
+
+        setup_ms = self.time_runs(SETUP_SNIPPET, options["runs"])
+        first_request_ms = self.time_runs(FIRST_REQUEST_SNIPPET, options["runs"])
+
+        self.stdout.write("")
+        self.report("django.setup()", setup_ms)
+        self.report("Time to first request", first_request_ms)
+
+        median = statistics.median(first_request_ms)
+        if median > options["budget_ms"]:
+            raise CommandError(
+                f"Time to first request {median:.0f} ms exceeds the {options['budget_ms']} ms budget"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Within the {options['budget_ms']} ms startup budget"))
+
+    def run_snippet(self, snippet, *python_args):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "youtube.settings"}
+        return subprocess.run(
+            [sys.executable, *python_args, "-c", snippet],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+    def time_runs(self, snippet, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = self.run_snippet(snippet)
+            elapsed = (time.perf_counter() - started) * 1000
+            if result.returncode != 0:
+                raise CommandError(f"Startup run failed:\n{result.stderr}")
+            timings.append(elapsed)
+        return timings
+
+    def import_breakdown(self, top):
+        result = self.run_snippet(FIRST_REQUEST_SNIPPET, "-X", "importtime")
+
+        # Lines look like "import time:   self [us] | cumulative | module"
+        self_us = defaultdict(int)
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            own, _cumulative, module = line[len("import time:"):].split("|")
+            self_us[module.strip().split(".")[0]] += int(own)
+
+        total = sum(self_us.values())
+        self.stdout.write(f"Import time by top-level package (total {total / 1000:.0f} ms):")
+        for package, us in sorted(self_us.items(), key=lambda item: item[1], reverse=True)[:top]:
+            self.stdout.write(f"  {package:<30} {us / 1000:8.1f} ms")
+
+        eager = [module for module in LAZY_MODULES if module in self_us]
+        if eager:
+            self.stdout.write(self.style.WARNING(f"Imported at startup but expected lazily: {', '.join(eager)}"))
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f"{label}: median {statistics.median(timings):.0f} ms, "
+            f"min {min(timings):.0f} ms, max {max(timings):.0f} ms over {len(timings)} runs"
+        )
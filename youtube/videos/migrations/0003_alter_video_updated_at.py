@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0002_videoviewersketch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='video',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0003_alter_video_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trendingscore',
+            name='computed_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
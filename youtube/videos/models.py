@@ -20,7 +20,7 @@ class Video(models.Model):
     dislikes = models.PositiveIntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     
     class Meta:
@@ -45,4 +45,25 @@ class Video(models.Model):
     def optimized_thumbnail_url(self):
         if not self.video_url:
             return ""
-        return get_optimized_video_url(self.video_url)
\ No newline at end of file
+        return get_optimized_video_url(self.video_url)
+
+
+class TrendingScore(models.Model):
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, primary_key=True, related_name="trending")
+    score = models.FloatField(db_index=True)
+    computed_at = models.DateTimeField(db_index=True)
+    
+    
+    class Meta:
+        ordering = ['-score']
+        
+    def __str__(self):
+        return f"{self.video_id}: {self.score:.4f}"
+
+
+class VideoViewerSketch(models.Model):
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, primary_key=True, related_name="viewer_sketch")
+    sketch = models.BinaryField()
+    
+    def __str__(self):
+        return f"Viewer sketch for video {self.video_id}"
\ No newline at end of file
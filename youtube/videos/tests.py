@@ -1,3 +1,662 @@
-from django.test import TestCase
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection, router
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from youtube.db_routers import PIN_COOKIE_NAME, ReplicaRoutingMiddleware, read_from_replica
+from youtube.staticfiles import BundledStaticFilesStorage, minify_css
+from .admission import (
+    acquire_upload_slot,
+    get_upload_metrics,
+    refund_upload_token,
+    release_upload_slot,
+    take_upload_token,
+)
+from .management.commands.benchmark_startup import FIRST_REQUEST_SNIPPET, LAZY_MODULES
+from .hyperloglog import HyperLogLog, merge_sketches
+from .models import TrendingScore, Video, VideoViewerSketch
+from .trending import recompute_trending_scores, score_rows
+from .viewers import channel_unique_viewers, record_unique_view
+
+
+class ScoreRowsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def score(self, views=100, likes=10, dislikes=0, age=timedelta(0), half_life_hours=24):
+        [(_, score)] = score_rows([(1, views, likes, dislikes, self.now - age)], self.now, half_life_hours)
+        return score
+
+    def test_score_halves_after_one_half_life(self):
+        self.assertAlmostEqual(self.score(age=timedelta(hours=24)), self.score() / 2)
+
+    def test_dislikes_penalise_score(self):
+        self.assertLess(self.score(dislikes=5), self.score())
+
+    def test_score_is_clamped_at_zero(self):
+        self.assertEqual(self.score(views=0, likes=0, dislikes=1000), 0.0)
+
+    def test_future_created_at_does_not_boost_score(self):
+        self.assertEqual(self.score(age=timedelta(hours=-5)), self.score())
+
+
+class TrendingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="trender", password="secret-pass-123")
+        cls.videos = [
+            Video.objects.create(
+                user=cls.user,
+                title=f"Trending {views}",
+                file_id=f"file-{views}",
+                video_url=f"https://ik.imagekit.io/demo/trending-{views}.mp4",
+                views=views,
+            )
+            for views in (10, 1000, 100, 10000, 1)
+        ]
+
+    def test_recompute_upserts_across_batches(self):
+        # 5 videos in batches of 2 ends with a partial batch
+        self.assertEqual(recompute_trending_scores(batch_size=2), 5)
+        self.assertEqual(TrendingScore.objects.count(), 5)
+
+        Video.objects.filter(pk=self.videos[-1].pk).update(views=10 ** 6)
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual(recompute_trending_scores(batch_size=2, now=later), 5)
+
+        self.assertEqual(TrendingScore.objects.count(), 5)
+        self.assertEqual(TrendingScore.objects.filter(computed_at=later).count(), 5)
+        self.assertEqual(TrendingScore.objects.first().video_id, self.videos[-1].pk)
+
+    def test_trending_feed_is_ordered_by_score(self):
+        recompute_trending_scores()
+
+        response = self.client.get(reverse("videos:trending"))
+
+        titles = [video.title for video in response.context["videos"]]
+        self.assertEqual(titles, ["Trending 10000", "Trending 1000", "Trending 100", "Trending 10", "Trending 1"])
+
+    @override_settings(TRENDING_FEED_SIZE=2)
+    def test_trending_feed_is_limited_to_feed_size(self):
+        recompute_trending_scores()
+
+        response = self.client.get(reverse("videos:trending"))
+
+        self.assertEqual([video.title for video in response.context["videos"]], ["Trending 10000", "Trending 1000"])
+
+
+class HyperLogLogTests(SimpleTestCase):
+
+    def sketch(self, values):
+        hll = HyperLogLog()
+        for value in values:
+            hll.add(value)
+        return hll
+
+    def test_small_counts_are_exact(self):
+        self.assertEqual(self.sketch(f"user:{i}" for i in range(10)).count(), 10)
+
+    def test_large_counts_are_within_error_bound(self):
+        # Standard error at the default precision is ~1.6%; allow 3 sigma
+        self.assertAlmostEqual(self.sketch(str(i) for i in range(50000)).count(), 50000, delta=50000 * 0.05)
+
+    def test_repeated_values_are_counted_once(self):
+        hll = self.sketch(["viewer"])
+        self.assertFalse(hll.add("viewer"))
+        self.assertEqual(hll.count(), 1)
+
+    def test_merge_counts_union(self):
+        merged = self.sketch(str(i) for i in range(3000)).merge(self.sketch(str(i) for i in range(1500, 4500)))
+        self.assertAlmostEqual(merged.count(), 4500, delta=4500 * 0.05)
+
+    def test_bytes_round_trip(self):
+        hll = self.sketch(str(i) for i in range(100))
+        data = hll.to_bytes()
+
+        self.assertEqual(len(data), 4097)
+        self.assertEqual(HyperLogLog.from_bytes(data).registers, hll.registers)
+        self.assertEqual(HyperLogLog.from_bytes(b"").count(), 0)
+
+    def test_merge_rejects_precision_mismatch(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(precision=10).merge(HyperLogLog(precision=12))
+
+    def test_invalid_precision_is_rejected(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(precision=20)
+
+    def test_merge_sketches_skips_empty_data(self):
+        merged = merge_sketches([self.sketch(["a"]).to_bytes(), b"", self.sketch(["b"]).to_bytes()])
+        self.assertEqual(merged.count(), 2)
+
+
+class UniqueViewerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="channel", password="secret-pass-123")
+        cls.videos = [
+            Video.objects.create(
+                user=cls.user,
+                title=f"Video {i}",
+                file_id=f"file-{i}",
+                video_url=f"https://ik.imagekit.io/demo/video-{i}.mp4",
+            )
+            for i in range(2)
+        ]
+
+    def test_record_unique_view_counts_distinct_viewers(self):
+        video = self.videos[0]
+        record_unique_view(video.id, "user:1")
+        record_unique_view(video.id, "user:1")
+        sketch = record_unique_view(video.id, "user:2")
+
+        self.assertEqual(sketch.count(), 2)
+        stored = VideoViewerSketch.objects.get(video=video).sketch
+        self.assertEqual(HyperLogLog.from_bytes(stored).count(), 2)
+
+    def test_repeat_view_does_not_rewrite_sketch(self):
+        video = self.videos[0]
+        record_unique_view(video.id, "user:1")
+
+        with CaptureQueriesContext(connection) as queries:
+            record_unique_view(video.id, "user:1")
+
+        self.assertFalse(any(query["sql"].startswith("UPDATE") for query in queries))
+
+    def test_channel_unique_viewers_merges_video_sketches(self):
+        record_unique_view(self.videos[0].id, "user:1")
+        record_unique_view(self.videos[1].id, "user:1")
+        record_unique_view(self.videos[1].id, "session:abc")
+
+        self.assertEqual(channel_unique_viewers(self.user.username), 2)
+
+    def test_channel_page_shows_unique_viewers(self):
+        record_unique_view(self.videos[0].id, "user:1")
+
+        response = self.client.get(reverse("videos:channel", args=[self.user.username]))
+
+        self.assertContains(response, "1 unique viewers")
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="publisher", password="secret-pass-123")
+        cls.video = Video.objects.create(
+            user=cls.user,
+            title="Conditional",
+            file_id="file-conditional",
+            video_url="https://ik.imagekit.io/demo/conditional.mp4",
+        )
+
+    def test_feed_sends_validators_and_cache_headers(self):
+        response = self.client.get(reverse("videos:list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("must-revalidate", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+    def test_matching_etag_returns_304_without_rendering(self):
+        etag = self.client.get(reverse("videos:list"))["ETag"]
+
+        response = self.client.get(reverse("videos:list"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response.templates, [])
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get(reverse("videos:list"))["Last-Modified"]
+
+        response = self.client.get(reverse("videos:list"), HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_video_invalidates_feed_etag(self):
+        etag = self.client.get(reverse("videos:list"))["ETag"]
+        Video.objects.create(
+            user=self.user,
+            title="Another",
+            file_id="file-another",
+            video_url="https://ik.imagekit.io/demo/another.mp4",
+        )
+
+        response = self.client.get(reverse("videos:list"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_differs_per_user(self):
+        anonymous_etag = self.client.get(reverse("videos:list"))["ETag"]
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("videos:list"), HTTP_IF_NONE_MATCH=anonymous_etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotIn("public", response["Cache-Control"])
+
+    def test_detail_setting_viewer_cookie_is_private(self):
+        response = self.client.get(reverse("videos:detail", args=[self.video.id]))
+
+        self.assertIn("viewer_id", response.cookies)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotIn("public", response["Cache-Control"])
+
+    def test_revalidated_detail_still_records_new_viewer(self):
+        etag = self.client.get(reverse("videos:detail", args=[self.video.id]))["ETag"]
+
+        # A different, cookie-less viewer revalidating a cached copy
+        response = self.client_class().get(reverse("videos:detail", args=[self.video.id]), HTTP_IF_NONE_MATCH=etag)
+
+        sketch = VideoViewerSketch.objects.get(video=self.video).sketch
+        self.assertEqual(HyperLogLog.from_bytes(sketch).count(), 2)
+        # The viewer count changed, so the cached copy is stale
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "2 unique viewers")
+        self.assertIn("viewer_id", response.cookies)
+
+    def test_repeat_viewer_revalidation_returns_304(self):
+        etag = self.client.get(reverse("videos:detail", args=[self.video.id]))["ETag"]
+
+        response = self.client.get(reverse("videos:detail", args=[self.video.id]), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn("viewer_id", response.cookies)
+
+    def test_missing_video_is_404(self):
+        self.assertEqual(self.client.get(reverse("videos:detail", args=[self.video.id + 100])).status_code, 404)
+
+    def test_detail_if_modified_since_does_not_hide_new_viewer(self):
+        response = self.client.get(reverse("videos:detail", args=[self.video.id]))
+        self.assertNotIn("Last-Modified", response)
+
+        # A cookie-less viewer revalidating on a date alone
+        response = self.client_class().get(
+            reverse("videos:detail", args=[self.video.id]),
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "2 unique viewers")
+
+    def test_channel_sends_no_last_modified(self):
+        response = self.client.get(reverse("videos:channel", args=[self.user.username]))
+
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
+    def test_deleted_trending_video_invalidates_etag(self):
+        Video.objects.create(
+            user=self.user,
+            title="Still trending",
+            file_id="file-still-trending",
+            video_url="https://ik.imagekit.io/demo/still-trending.mp4",
+        )
+        recompute_trending_scores()
+        etag = self.client.get(reverse("videos:trending"))["ETag"]
+
+        self.video.delete()
+        response = self.client.get(reverse("videos:trending"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_edited_trending_video_invalidates_etag(self):
+        recompute_trending_scores()
+        etag = self.client.get(reverse("videos:trending"))["ETag"]
+
+        self.video.title = "Renamed"
+        self.video.save()
+        response = self.client.get(reverse("videos:trending"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Renamed")
+
+
+@override_settings(STATIC_BUNDLES={"css/bundle.css": ["css/first.css", "css/second.css"]})
+class StaticBundleTests(SimpleTestCase):
+
+    def setUp(self):
+        self.static_root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(STATIC_ROOT=self.static_root))
+
+    sources = {
+        "css/first.css": "/* header */\nbody {\n    color: red;\n}\n",
+        # Large enough for WhiteNoise to find compressing worthwhile
+        "css/second.css": "".join(f".col-{i} > p , a {{ margin: {i}px ; }}\n" for i in range(100)),
+    }
+
+    def collect(self):
+        storage = BundledStaticFilesStorage()
+        for name, content in self.sources.items():
+            storage.save(name, ContentFile(content.encode()))
+        list(storage.post_process({name: (storage, name) for name in self.sources}))
+        return storage
+
+    def render_bundle(self):
+        return Template("{% load static_bundles %}{% css_bundle 'css/bundle.css' %}").render(Context())
+
+    def test_minify_css_strips_comments_and_whitespace(self):
+        self.assertEqual(
+            minify_css("/* note */\nul > li ,\na {\n  color: red;\n  margin: 0 auto;\n}\n"),
+            "ul>li,a{color:red;margin:0 auto}",
+        )
+
+    def test_minify_css_keeps_descendant_pseudo_class_space(self):
+        self.assertEqual(minify_css("form :invalid { color: red; }"), "form :invalid{color:red}")
+
+    def test_post_process_writes_hashed_compressed_bundle(self):
+        storage = self.collect()
+
+        hashed_name = storage.stored_name("css/bundle.css")
+        self.assertRegex(hashed_name, r"^css/bundle\.[0-9a-f]{12}\.css$")
+        bundle = (self.static_root / hashed_name).read_text()
+        self.assertTrue(bundle.startswith("body{color:red}\n.col-0>p,a{margin:0px}.col-1>p,a{margin:1px}"))
+        self.assertEqual(bundle, "\n".join(minify_css(css) for css in self.sources.values()))
+        self.assertTrue((self.static_root / f"{hashed_name}.gz").exists())
+        self.assertTrue((self.static_root / f"{hashed_name}.br").exists())
+
+    def test_css_bundle_links_hashed_bundle_after_collectstatic(self):
+        hashed_name = self.collect().stored_name("css/bundle.css")
+
+        self.assertHTMLEqual(self.render_bundle(), f'<link rel="stylesheet" href="/static/{hashed_name}">')
+
+    def test_css_bundle_links_sources_without_manifest(self):
+        self.assertHTMLEqual(
+            self.render_bundle(),
+            '<link rel="stylesheet" href="/static/css/first.css">'
+            '<link rel="stylesheet" href="/static/css/second.css">',
+        )
+
+    def test_stored_name_falls_back_to_source_name_without_manifest(self):
+        self.assertEqual(BundledStaticFilesStorage().stored_name("css/base.css"), "css/base.css")
+
+    @override_settings(STATIC_MANIFEST_FALLBACK=False)
+    def test_stored_name_without_manifest_raises_when_fallback_disabled(self):
+        with self.assertRaises(ValueError):
+            BundledStaticFilesStorage().stored_name("css/base.css")
+
+
+class AnonymousFastPathTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="creator", password="secret-pass-123")
+        cls.videos = [
+            Video.objects.create(
+                user=cls.user,
+                title=f"Video {i}",
+                file_id=f"file-{i}",
+                video_url=f"https://ik.imagekit.io/demo/video-{i}.mp4",
+            )
+            for i in range(3)
+        ]
+
+    def assertNoSessionQueries(self, queries):
+        tables = [query["sql"] for query in queries if "django_session" in query["sql"]]
+        self.assertEqual(tables, [])
+
+    def test_anonymous_feed_costs_only_the_feed_query(self):
+        # One query for the conditional GET validators, one for the feed itself
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("videos:list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("sessionid", response.cookies)
+        self.assertContains(response, "Sign In")
+
+    def test_anonymous_channel_skips_session(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("videos:channel", args=[self.user.username]))
+
+        self.assertEqual(response.status_code, 200)
+        # Validators, the channel's videos and its unique-viewer sketches
+        self.assertEqual(len(queries), 3)
+        self.assertNoSessionQueries(queries)
+
+    def test_anonymous_detail_skips_session(self):
+        video = self.videos[0]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("videos:detail", args=[video.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNoSessionQueries(queries)
+        self.assertNotIn("sessionid", response.cookies)
+        self.assertIn("viewer_id", response.cookies)
+
+    def test_authenticated_feed_still_loads_user(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("videos:list"))
+
+        self.assertContains(response, self.user.username)
+        self.assertContains(response, "Logout")
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.routed = []
+
+    def handle(self, view, request):
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(router.db_for_read(Video), "default")
+
+    def test_replica_view_reads_use_replica(self):
+        @read_from_replica
+        def view(request):
+            self.routed.append(router.db_for_read(Video))
+            return HttpResponse()
+
+        response = self.handle(view, self.factory.get("/"))
+
+        self.assertEqual(self.routed, ["replica1"])
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+    def test_one_replica_serves_every_read_of_a_request(self):
+        @read_from_replica
+        def view(request):
+            self.routed.extend(router.db_for_read(Video) for _ in range(20))
+            return HttpResponse()
+
+        self.handle(view, self.factory.get("/"))
+
+        self.assertEqual(len(set(self.routed)), 1)
+        self.assertIn(self.routed[0], ["replica1", "replica2"])
+
+    def test_undecorated_view_reads_use_primary(self):
+        def view(request):
+            self.routed.append(router.db_for_read(Video))
+            return HttpResponse()
+
+        self.handle(view, self.factory.get("/"))
+
+        self.assertEqual(self.routed, ["default"])
+
+    def test_write_pins_rest_of_request_and_client(self):
+        @read_from_replica
+        def view(request):
+            self.routed.append(router.db_for_read(Video))
+            self.routed.append(router.db_for_write(Video))
+            self.routed.append(router.db_for_read(Video))
+            return HttpResponse()
+
+        response = self.handle(view, self.factory.get("/"))
+
+        self.assertEqual(self.routed, ["replica1", "default", "default"])
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+
+    def test_unpinned_model_writes_keep_replica_reads(self):
+        @read_from_replica
+        def view(request):
+            router.db_for_write(VideoViewerSketch)
+            self.routed.append(router.db_for_read(Video))
+            return HttpResponse()
+
+        response = self.handle(view, self.factory.get("/"))
+
+        self.assertEqual(self.routed, ["replica1"])
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+    def test_pin_cookie_routes_reads_to_primary(self):
+        @read_from_replica
+        def view(request):
+            self.routed.append(router.db_for_read(Video))
+            return HttpResponse()
+
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE_NAME] = "1"
+        self.handle(view, request)
+
+        self.assertEqual(self.routed, ["default"])
+
+
+class StartupImportTests(SimpleTestCase):
+
+    def test_first_request_does_not_import_lazy_dependencies(self):
+        check = FIRST_REQUEST_SNIPPET + f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+        result = subprocess.run(
+            [sys.executable, "-c", check],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+
+@override_settings(UPLOAD_BURST=1)
+class UploadAdmissionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="uploader", password="secret-pass-123")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_rate_limited_upload_gets_429_with_retry_after(self):
+        # The first upload is admitted and fails validation (no file)
+        self.assertEqual(self.client.post(reverse("videos:upload_submit")).status_code, 400)
+
+        response = self.client.post(reverse("videos:upload_submit"))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(get_upload_metrics()["rate_limited"], 1)
+
+    @override_settings(UPLOAD_MAX_CONCURRENT=0)
+    def test_saturated_node_sheds_upload_with_503(self):
+        response = self.client.post(reverse("videos:upload_submit"))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        metrics = get_upload_metrics()
+        self.assertEqual(metrics["saturated"], 1)
+        self.assertEqual(metrics["admitted"], 0)
+
+    def test_admitted_upload_releases_its_slot(self):
+        self.client.post(reverse("videos:upload_submit"))
+
+        metrics = get_upload_metrics()
+        self.assertEqual(metrics["admitted"], 1)
+        self.assertEqual(metrics["in_flight"], 0)
+
+    @override_settings(UPLOAD_MAX_CONCURRENT=2, UPLOAD_SLOT_TIMEOUT=60)
+    def test_expired_lease_frees_only_its_own_slot(self):
+        stale = acquire_upload_slot()
+
+        with mock.patch("time.time", return_value=time.time() + 61):
+            fresh = [acquire_upload_slot(), acquire_upload_slot()]
+            self.assertNotIn(None, fresh)
+            self.assertIsNone(acquire_upload_slot())
+
+            # A late release of the expired lease must not free a live one
+            release_upload_slot(stale)
+            self.assertEqual(get_upload_metrics()["in_flight"], 2)
+            self.assertIsNone(acquire_upload_slot())
+
+            release_upload_slot(fresh[0])
+            self.assertEqual(get_upload_metrics()["in_flight"], 1)
+
+    def hold_bucket_lock(self):
+        lock_key = f"uploads:bucket:{self.user.id}:lock"
+        cache.add(lock_key, 1)
+        return lock_key
+
+    def test_token_take_waits_out_a_briefly_held_lock(self):
+        lock_key = self.hold_bucket_lock()
+
+        # The other request releases the lock while we back off
+        with mock.patch("videos.admission.time.sleep", side_effect=lambda _: cache.delete(lock_key)) as sleep:
+            self.assertEqual(take_upload_token(self.user.id), 0)
+
+        sleep.assert_called_once()
+        self.assertIsNotNone(cache.get(f"uploads:bucket:{self.user.id}"))
+
+    def test_upload_shed_as_contended_while_bucket_stays_locked(self):
+        self.hold_bucket_lock()
+
+        with mock.patch("videos.admission.time.sleep"):
+            response = self.client.post(reverse("videos:upload_submit"))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        metrics = get_upload_metrics()
+        self.assertEqual(metrics["contended"], 1)
+        self.assertEqual(metrics["rate_limited"], 0)
+
+    def test_refund_waits_out_a_briefly_held_lock(self):
+        take_upload_token(self.user.id)
+        lock_key = self.hold_bucket_lock()
+
+        with mock.patch("videos.admission.time.sleep", side_effect=lambda _: cache.delete(lock_key)):
+            refund_upload_token(self.user.id)
+
+        # The refunded token admits another upload despite UPLOAD_BURST=1
+        self.assertEqual(take_upload_token(self.user.id), 0)
+
+    @override_settings(UPLOAD_MAX_CONCURRENT=2)
+    def test_pages_are_served_while_upload_slots_are_saturated(self):
+        leases = [acquire_upload_slot(), acquire_upload_slot()]
+        self.assertNotIn(None, leases)
+
+        with mock.patch("videos.admission.time.sleep") as sleep:
+            upload = self.client.post(reverse("videos:upload_submit"))
+            page = self.client.get(reverse("videos:list"))
+
+        # The upload is shed at once, without holding the worker
+        self.assertEqual(upload.status_code, 503)
+        sleep.assert_not_called()
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(get_upload_metrics()["in_flight"], 2)
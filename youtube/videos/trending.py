@@ -0,0 +1,97 @@
+"""
+Time-decayed trending scores.
+
+Scores are recomputed in batches by the ``compute_trending`` management
+command and stored in ``TrendingScore``, so the trending feed only reads
+the top rows of an indexed table instead of scoring the whole catalog.
+"""
+import math
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TrendingScore, Video
+
+LIKE_WEIGHT = 2.0
+DISLIKE_WEIGHT = 2.0
+
+# (video_id, views, likes, dislikes, created_at)
+VideoRow = Tuple[int, int, int, int, datetime]
+
+
+def score_rows(rows: Iterable[VideoRow], now: datetime, half_life_hours: float) -> List[Tuple[int, float]]:
+    """
+    Score a batch of video rows.
+
+    Popularity is the log-damped engagement of a video, which then decays
+    exponentially with age so a video loses half its score every
+    ``half_life_hours``.
+
+    Args:
+        rows: Tuples of (video_id, views, likes, dislikes, created_at)
+        now: Reference time used to compute each video's age
+        half_life_hours: Hours after which a score is halved
+
+    Returns:
+        List of (video_id, score) tuples in input order
+    """
+    decay = math.log(2) / (half_life_hours * 3600)
+    now_ts = now.timestamp()
+    log1p = math.log1p
+    exp = math.exp
+
+    return [
+        (
+            video_id,
+            max(0.0, log1p(views) + LIKE_WEIGHT * log1p(likes) - DISLIKE_WEIGHT * log1p(dislikes))
+            * exp(-decay * max(0.0, now_ts - created_at.timestamp())),
+        )
+        for video_id, views, likes, dislikes, created_at in rows
+    ]
+
+
+def recompute_trending_scores(batch_size: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """
+    Recompute and store trending scores for every video.
+
+    Videos are walked in primary key order with keyset pagination so each
+    batch is a single indexed range query, and scores are upserted in bulk.
+
+    Args:
+        batch_size: Videos scored per batch (defaults to TRENDING_BATCH_SIZE)
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        Number of videos scored
+    """
+    batch_size = batch_size or settings.TRENDING_BATCH_SIZE
+    now = now or timezone.now()
+    half_life = settings.TRENDING_HALF_LIFE_HOURS
+
+    rows_qs = Video.objects.order_by("id").values_list("id", "views", "likes", "dislikes", "created_at")
+    last_id = 0
+    total = 0
+
+    while True:
+        rows = list(rows_qs.filter(id__gt=last_id)[:batch_size])
+        if not rows:
+            break
+
+        with transaction.atomic():
+            TrendingScore.objects.bulk_create(
+                [
+                    TrendingScore(video_id=video_id, score=score, computed_at=now)
+                    for video_id, score in score_rows(rows, now, half_life)
+                ],
+                update_conflicts=True,
+                unique_fields=["video"],
+                update_fields=["score", "computed_at"],
+            )
+
+        total += len(rows)
+        last_id = rows[-1][0]
+
+    return total
@@ -6,8 +6,10 @@ app_name = "videos"
 
 urlpatterns = [
     path("", views.video_list, name="list"),
+    path("trending/", views.trending_videos, name="trending"),
     path("upload/", views.video_upload_page, name="upload"),
     path("upload/submit/", views.video_upload, name="upload_submit"),
+    path("upload/metrics/", views.upload_metrics, name="upload_metrics"),
     path("<int:video_id>", views.video_detail, name="detail"),
     path("channel/<str:username>/",views.channel_videos, name="channel")
 ]
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Unique-viewer tracking backed by per-video HyperLogLog sketches.
+
+Each video keeps one fixed-size sketch; channel totals are obtained by
+merging the sketches of the channel's videos, so a viewer who watched
+several videos on a channel is still counted once.
+"""
+import uuid
+from functools import wraps
+
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+
+from youtube.sessions import has_session_cookie
+from .hyperloglog import HyperLogLog, merge_sketches
+from .models import VideoViewerSketch
+
+VIEWER_COOKIE_NAME = "viewer_id"
+VIEWER_COOKIE_SALT = "videos.viewers"
+VIEWER_COOKIE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def get_viewer_key(request) -> str:
+    """
+    Identify the viewer behind a request.
+
+    Authenticated users are keyed on their user id and viewers with a
+    session on their session key. Anonymous viewers without a session get
+    a signed viewer cookie instead, so no session is created for them;
+    call ``remember_viewer`` on the response to set it.
+    """
+    if has_session_cookie(request):
+        if request.user.is_authenticated:
+            return f"user:{request.user.id}"
+        if request.session.session_key:
+            return f"session:{request.session.session_key}"
+
+    viewer_id = request.get_signed_cookie(VIEWER_COOKIE_NAME, default=None, salt=VIEWER_COOKIE_SALT)
+    if viewer_id is None:
+        viewer_id = request.new_viewer_id = uuid.uuid4().hex
+    return f"viewer:{viewer_id}"
+
+
+def remember_viewer(request, response):
+    """
+    Set the viewer cookie if ``get_viewer_key`` issued a new viewer id.
+
+    The response is marked private so a fronting cache never hands the same
+    viewer id to other visitors.
+    """
+    viewer_id = getattr(request, "new_viewer_id", None)
+    if viewer_id:
+        patch_cache_control(response, private=True)
+        response.set_signed_cookie(
+            VIEWER_COOKIE_NAME,
+            viewer_id,
+            salt=VIEWER_COOKIE_SALT,
+            max_age=VIEWER_COOKIE_MAX_AGE,
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+def record_unique_view(video_id: int, viewer_key: str) -> HyperLogLog:
+    """
+    Add a viewer to a video's sketch.
+
+    The sketch is only written back when one of its registers changed,
+    which is rare for repeat viewers.
+
+    Returns:
+        The video's up-to-date sketch
+    """
+    with transaction.atomic():
+        row, _ = VideoViewerSketch.objects.select_for_update().get_or_create(
+            video_id=video_id,
+            defaults={"sketch": HyperLogLog().to_bytes()},
+        )
+        sketch = HyperLogLog.from_bytes(row.sketch)
+        if sketch.add(viewer_key):
+            row.sketch = sketch.to_bytes()
+            row.save(update_fields=["sketch"])
+        return sketch
+
+
+def channel_unique_viewers(username: str) -> int:
+    sketches = VideoViewerSketch.objects.filter(video__user__username=username).values_list("sketch", flat=True)
+    return merge_sketches(sketches).count()
+
+
+def remembers_viewer(view_func):
+    """
+    Decorator setting the viewer cookie on every response of a view,
+    including 304s returned before the view itself runs.
+    """
+    @wraps(view_func)
+    def inner(request, *args, **kwargs):
+        return remember_viewer(request, view_func(request, *args, **kwargs))
+    return inner
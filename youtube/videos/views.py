@@ -1,34 +1,74 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 
+from youtube.db_routers import read_from_replica
 from youtube.logging_utils import get_logger, log_with_context, log_exception
-from .models import Video
+from .models import Video, TrendingScore
 from .forms import VideoUploadForm
 from .imagekit_client import upload_video, upload_thumbnail
+from .admission import upload_admission, get_upload_metrics
+from .conditional import (
+    conditional_page, video_list_validators, channel_validators,
+    trending_validators, video_detail_validators
+)
+from .viewers import get_viewer_key, record_unique_view, remembers_viewer, channel_unique_viewers
 
 logger = get_logger(__name__)
 
 
 # Create your views here.
 
+@read_from_replica
+@conditional_page(video_list_validators)
 def video_list(request):
-    videos = Video.objects.all()
+    videos = Video.objects.select_related("user")
     return render(request, 'videos/list.html', {"videos": videos})
 
 
+@read_from_replica
+@conditional_page(trending_validators)
+def trending_videos(request):
+    scores = TrendingScore.objects.select_related("video__user")[:settings.TRENDING_FEED_SIZE]
+    videos = [score.video for score in scores]
+    return render(request, "videos/list.html", {"videos": videos})
+
+
+@read_from_replica
+@conditional_page(channel_validators)
 def channel_videos(request, username):
-    videos = Video.objects.filter(user__username=username)
-    return render((request, "videos/channel.html", {"videos": videos, "channel_name": username}))
+    videos = Video.objects.filter(user__username=username).select_related("user")
+    
+    # Usually already computed by the conditional GET validators
+    unique_viewers = getattr(request, "unique_viewers", None)
+    if unique_viewers is None:
+        unique_viewers = channel_unique_viewers(username)
+    
+    return render(request, "videos/channel.html", {
+        "videos": videos,
+        "channel_name": username,
+        "unique_viewers": unique_viewers,
+    })
     
 
+@read_from_replica
+@remembers_viewer
+@conditional_page(video_detail_validators)
 def video_detail(request, video_id):
-    video = get_object_or_404(Video.objects, id=video_id)
+    video = get_object_or_404(Video.objects.select_related("user"), id=video_id)
     
-    return render(request, "videos/detail.html", {"video": video})
+    # Usually already recorded by the conditional GET validators
+    unique_viewers = getattr(request, "unique_viewers", None)
+    if unique_viewers is None:
+        unique_viewers = record_unique_view(video.id, get_viewer_key(request)).count()
+    
+    return render(request, "videos/detail.html", {"video": video, "unique_viewers": unique_viewers})
     
 
+@upload_admission
 @login_required
 @require_POST
 def video_upload(request):
@@ -111,4 +151,9 @@ def video_upload(request):
 
 @login_required
 def video_upload_page(request):
-    return render(request, "videos/upload.html", {"form": VideoUploadForm()})
\ No newline at end of file
+    return render(request, "videos/upload.html", {"form": VideoUploadForm()})
+
+
+@staff_member_required
+def upload_metrics(request):
+    return JsonResponse(get_upload_metrics())
\ No newline at end of file
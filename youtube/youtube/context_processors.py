@@ -0,0 +1,16 @@
+from django.contrib.auth.context_processors import PermWrapper
+
+from .sessions import get_request_user
+
+
+def auth(request):
+    """
+    Override ``user`` and ``perms`` from ``django.contrib.auth.context_processors.auth``
+    (which the admin requires) so templates leave the session untouched for
+    anonymous visitors.
+    """
+    user = get_request_user(request)
+    return {
+        'user': user,
+        'perms': PermWrapper(user),
+    }
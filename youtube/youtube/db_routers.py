@@ -0,0 +1,105 @@
+"""
+Primary/replica database routing.
+
+Views decorated with ``read_from_replica`` send their reads to one of the
+databases in ``settings.DATABASE_REPLICAS``, picked once per request so a
+page and its conditional GET validators see the same snapshot; everything
+else, and every write, goes to ``default``. Once a request writes, the rest of it and the
+client's following requests (for ``DATABASE_REPLICA_LAG_SECONDS``) read
+from the primary so users always see their own changes.
+"""
+import random
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+
+PRIMARY_DB = 'default'
+PIN_COOKIE_NAME = 'primary_pin'
+
+
+class RoutingState:
+    """Per-request routing flags and the replica chosen for the request."""
+
+    def __init__(self, pinned: bool = False, replica: Optional[str] = None):
+        self.replica_reads = False
+        self.pinned = pinned
+        self.replica = replica
+        self.wrote = False
+
+
+_routing_state: ContextVar = ContextVar('db_routing_state', default=None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending replica-safe reads to the request's replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or state.replica is None or not state.replica_reads or state.pinned:
+            return PRIMARY_DB
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None and model._meta.label_lower not in settings.DATABASE_ROUTING_UNPINNED_MODELS:
+            state.wrote = True
+            state.pinned = True
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+def read_from_replica(view_func):
+    """
+    Decorator allowing a read-only view's queries to be served by a replica.
+    """
+    @wraps(view_func)
+    def inner(request, *args, **kwargs):
+        state = _routing_state.get()
+        if state is None or request.method not in ('GET', 'HEAD'):
+            return view_func(request, *args, **kwargs)
+
+        state.replica_reads = True
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            state.replica_reads = False
+    return inner
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Middleware tracking writes per request and pinning clients that just
+    wrote to the primary for the configured replica lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = settings.DATABASE_REPLICAS
+        state = RoutingState(
+            pinned=PIN_COOKIE_NAME in request.COOKIES,
+            replica=random.choice(replicas) if replicas else None,
+        )
+        token = _routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE_NAME,
+                '1',
+                max_age=settings.DATABASE_REPLICA_LAG_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -98,14 +98,15 @@ class RequestLogger:
         import uuid
         request.request_id = str(uuid.uuid4())
         
-        # Log request
-        user_info = f'user={request.user.username if request.user.is_authenticated else "anonymous"}'
+        # Log request (anonymous requests skip the session lookup)
+        from .sessions import get_request_user
+        user = get_request_user(request)
         log_with_context(
             self.logger,
             'info',
             f'{request.method} {request.path}',
             request_id=request.request_id,
-            user=request.user.username if request.user.is_authenticated else 'anonymous',
+            user=user.username if user.is_authenticated else 'anonymous',
             ip=self.get_client_ip(request)
         )
         
@@ -0,0 +1,20 @@
+"""
+Helpers for serving anonymous traffic without touching the session.
+"""
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+
+
+def has_session_cookie(request) -> bool:
+    """Whether the request carries a session cookie worth loading."""
+    return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+def get_request_user(request):
+    """
+    Return ``request.user``, or an AnonymousUser without loading the
+    session when the request has no session cookie.
+    """
+    if has_session_cookie(request):
+        return request.user
+    return AnonymousUser()
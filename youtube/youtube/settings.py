@@ -12,13 +12,15 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Load environment variables from .env file
-load_dotenv(BASE_DIR / '.env')
+# Load environment variables from .env file (python-dotenv is only imported
+# when there is one)
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
 
 # Environment
 ENVIRONMENT = os.getenv('ENVIRONMENT', 'development')
@@ -51,8 +53,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'youtube.db_routers.ReplicaRoutingMiddleware',
+    'videos.admission.UploadAdmissionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -70,8 +75,12 @@ TEMPLATES = [
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
+                'youtube.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'libraries': {
+                'static_bundles': 'youtube.static_bundles',
+            },
         },
     },
 ]
@@ -89,6 +98,28 @@ DATABASES = {
     }
 }
 
+# Read replicas as comma-separated database names, e.g.
+# DATABASE_REPLICAS=db_replica.sqlite3 to test locally against a copy of
+# db.sqlite3. Replica-safe views read from them; writes go to 'default'.
+DATABASE_REPLICAS = []
+for index, name in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['youtube.db_routers.PrimaryReplicaRouter']
+
+# How long a client that just wrote keeps reading from the primary
+DATABASE_REPLICA_LAG_SECONDS = int(os.getenv('DATABASE_REPLICA_LAG_SECONDS', '5'))
+
+# Models whose writes don't need read-after-write consistency (view stats,
+# materialized rankings), so they don't pin the client to the primary
+DATABASE_ROUTING_UNPINNED_MODELS = ['videos.videoviewersketch', 'videos.trendingscore']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -128,11 +159,64 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static"
 ]
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Hashed, precompressed (gzip + brotli) files served by WhiteNoise with
+# far-future cache headers
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "youtube.staticfiles.BundledStaticFilesStorage",
+    },
+}
+
+# Serve unhashed source files when collectstatic hasn't produced a manifest.
+# Follows DEBUG as configured here, so test runs (which force DEBUG off) keep
+# it; a production deploy that skipped collectstatic fails loudly instead.
+STATIC_MANIFEST_FALLBACK = DEBUG
+
+# Stylesheets concatenated and minified into one file at collectstatic time,
+# in cascade order
+STATIC_BUNDLES = {
+    "css/bundle.css": [
+        "css/variables.css",
+        "css/base.css",
+        "css/navbar.css",
+        "css/messages.css",
+        "css/buttons.css",
+        "css/forms.css",
+        "css/videos.css",
+        "css/videoplayer.css",
+        "css/upload.css",
+        "css/auth.css",
+    ],
+}
 
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
 LOGIN_URL = "/accounts/login/"
 
+# Upload admission control, tracked in the default cache (use a shared
+# backend such as Redis so limits hold across workers)
+UPLOAD_RATE_LIMIT = int(os.getenv('UPLOAD_RATE_LIMIT', '10'))  # uploads per user...
+UPLOAD_RATE_PERIOD = 3600  # ...per this many seconds
+UPLOAD_BURST = 3
+UPLOAD_MAX_CONCURRENT = int(os.getenv('UPLOAD_MAX_CONCURRENT', '4'))  # in-flight uploads per node
+UPLOAD_SLOT_TIMEOUT = 15 * 60  # slot lease expiry, in case a worker dies mid-upload
+UPLOAD_RETRY_AFTER = 30
+
+# Sessions are read through the cache and only loaded when a session cookie
+# is present, so anonymous page views never hit the sessions table
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Trending feed
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '24'))
+TRENDING_BATCH_SIZE = 5000
+TRENDING_FEED_SIZE = 50
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
@@ -141,6 +225,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Logging Configuration
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO')
 
+# 'json' switches file logs to pythonjsonlogger, which is otherwise not imported
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -155,10 +242,6 @@ LOGGING = {
             'style': '{',
             'datefmt': '%Y-%m-%d %H:%M:%S',
         },
-        'json': {
-            '()': 'pythonjsonlogger.jsonlogger.JsonFormatter',
-            'format': '%(asctime)s %(name)s %(levelname)s %(message)s %(pathname)s %(lineno)d',
-        },
     },
     'filters': {
         'require_debug_false': {
@@ -251,3 +334,14 @@ LOGGING = {
         'level': LOG_LEVEL,
     },
 }
+
+if LOG_FORMAT == 'json':
+    LOGGING['formatters']['json'] = {
+        '()': 'pythonjsonlogger.jsonlogger.JsonFormatter',
+        'format': '%(asctime)s %(name)s %(levelname)s %(message)s %(pathname)s %(lineno)d',
+    }
+    for handler in ('file', 'error_file', 'security_file', 'video_file'):
+        LOGGING['handlers'][handler]['formatter'] = 'json'
+
+# Startup time budget enforced by `manage.py benchmark_startup`
+STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', '1000'))
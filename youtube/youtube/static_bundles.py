@@ -0,0 +1,29 @@
+"""
+Template tags for static asset bundles.
+"""
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from .staticfiles import get_bundles
+
+register = template.Library()
+
+
+@register.simple_tag
+def css_bundle(name):
+    """
+    Link a stylesheet bundle.
+
+    Renders the single hashed bundle once collectstatic has built it, and
+    the individual source stylesheets otherwise (development, tests).
+    """
+    has_hashed_name = getattr(staticfiles_storage, 'has_hashed_name', None)
+    if not settings.DEBUG and has_hashed_name and has_hashed_name(name):
+        names = [name]
+    else:
+        names = get_bundles()[name]
+
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((static(n),) for n in names))